@@ -2,12 +2,38 @@
 Test suite for ttok4bedrock
 """
 
+import json
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import ANY, Mock, patch, MagicMock
 from botocore.exceptions import ClientError, NoCredentialsError, NoRegionError
 
-from ttok4bedrock import count_tokens, truncate
-from ttok4bedrock.bedrock_counter import BedrockTokenCounter
+from ttok4bedrock import DiskCache, count_tokens, truncate, _get_counter
+from ttok4bedrock.bedrock_counter import BedrockTokenCounter, _CLIENT_CACHE
+from ttok4bedrock._cache import default_cache_path
+
+
+def fake_count_tokens(tokens_for):
+    """
+    Build a stand-in for the client's count_tokens that derives inputTokens
+    from the user message in the request body (never less than 1, like the API).
+    """
+    def mock_count_tokens(modelId, input):
+        content = json.loads(input["invokeModel"]["body"])["messages"][0]["content"]
+        return {"inputTokens": max(1, tokens_for(content))}
+    return mock_count_tokens
+
+
+@pytest.fixture(autouse=True)
+def clear_shared_state(tmp_path, monkeypatch):
+    """Isolate each test from shared caches and from the user's disk cache."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    _CLIENT_CACHE.clear()
+    _get_counter.cache_clear()
+    BedrockTokenCounter._message_overhead.clear()
+    yield
+    _CLIENT_CACHE.clear()
+    _get_counter.cache_clear()
+    BedrockTokenCounter._message_overhead.clear()
 
 
 class TestBedrockTokenCounter:
@@ -28,7 +54,37 @@ class TestBedrockTokenCounter:
         client = counter.client
         assert client is not None
         assert counter._client is not None
-        mock_client.assert_called_once_with(service_name='bedrock-runtime')
+        mock_client.assert_called_once_with(service_name='bedrock-runtime', config=ANY)
+    
+    @patch('boto3.client')
+    def test_client_shared_across_instances(self, mock_client):
+        """Test that counters in the same region reuse one Bedrock client."""
+        mock_client.side_effect = lambda **kwargs: Mock()
+        
+        first = BedrockTokenCounter(region='us-east-1')
+        second = BedrockTokenCounter(region='us-east-1')
+        other = BedrockTokenCounter(region='eu-west-1')
+        
+        assert first.client is second.client
+        assert other.client is not first.client
+        assert mock_client.call_count == 2
+    
+    @patch('boto3.client')
+    def test_client_built_once_under_concurrency(self, mock_client):
+        """Test that concurrent first uses of a region build a single client."""
+        from concurrent.futures import ThreadPoolExecutor
+        import time
+        
+        def slow_client(**kwargs):
+            time.sleep(0.01)
+            return Mock()
+        mock_client.side_effect = slow_client
+        
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            clients = list(pool.map(lambda _: BedrockTokenCounter(region='us-east-1').client, range(4)))
+        
+        assert all(client is clients[0] for client in clients)
+        assert mock_client.call_count == 1
     
     @patch('boto3.client')
     def test_region_configuration(self, mock_client):
@@ -41,9 +97,21 @@ class TestBedrockTokenCounter:
         
         mock_client.assert_called_once_with(
             service_name='bedrock-runtime',
-            region_name='us-west-2'
+            region_name='us-west-2',
+            config=ANY
         )
     
+    @patch('boto3.client')
+    def test_client_connection_config(self, mock_client):
+        """Test that the client is built with pooled keep-alive connections."""
+        counter = BedrockTokenCounter(max_pool_connections=16)
+        _ = counter.client
+        
+        config = mock_client.call_args.kwargs['config']
+        assert config.max_pool_connections == 16
+        assert config.tcp_keepalive is True
+        assert config.retries == {'max_attempts': 5, 'mode': 'adaptive'}
+    
     def test_format_input_claude(self):
         """Test input formatting for Claude models."""
         counter = BedrockTokenCounter()
@@ -55,11 +123,44 @@ class TestBedrockTokenCounter:
         
         assert "invokeModel" in formatted
         body = formatted["invokeModel"]["body"]
-        import json
         parsed_body = json.loads(body)
         assert "anthropic_version" in parsed_body
         assert "messages" in parsed_body
     
+    def test_format_input_escapes_text(self):
+        """Test that the request body round-trips text needing JSON escapes."""
+        counter = BedrockTokenCounter()
+        text = 'Quote " backslash \\ newline \n tab \t unicode é 😀 braces {x}'
+        
+        formatted = counter._format_input_for_model(
+            text,
+            "anthropic.claude-3-5-haiku-20241022-v1:0"
+        )
+        
+        assert json.loads(formatted["invokeModel"]["body"]) == {
+            "anthropic_version": "bedrock-2023-05-31",
+            "messages": [{"role": "user", "content": text}],
+            "max_tokens": 1,
+        }
+    
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_format_input_json_backends(self, monkeypatch, use_orjson):
+        """Test that the body is identical JSON with and without orjson."""
+        from ttok4bedrock import bedrock_counter
+        if use_orjson:
+            pytest.importorskip("orjson")
+        else:
+            monkeypatch.setattr(bedrock_counter, "orjson", None)
+        counter = BedrockTokenCounter()
+        
+        for text in ["Plain text", 'Quote " and é', "Lone surrogate \ud800"]:
+            formatted = counter._format_input_for_model(
+                text,
+                "anthropic.claude-3-5-haiku-20241022-v1:0"
+            )
+            parsed_body = json.loads(formatted["invokeModel"]["body"])
+            assert parsed_body["messages"][0]["content"] == text
+    
     def test_format_input_unsupported_model(self):
         """Test input formatting for unsupported models raises ValueError."""
         counter = BedrockTokenCounter()
@@ -106,6 +207,71 @@ class TestBedrockTokenCounter:
         assert result < 42  # Should be less than raw API response
         mock_bedrock_client.count_tokens.assert_called()
     
+    @patch('boto3.client')
+    def test_count_tokens_cache(self, mock_client):
+        """Test that repeated counts are served from the LRU cache."""
+        mock_bedrock_client = Mock()
+        mock_bedrock_client.count_tokens.return_value = {"inputTokens": 10}
+        mock_client.return_value = mock_bedrock_client
+
+        counter = BedrockTokenCounter(cache_size=2)
+        model_id = "anthropic.claude-3-5-haiku-20241022-v1:0"
+
+        counter.count_tokens("Test text", model_id)  # text + overhead probe
+        counter.count_tokens("Test text", model_id)
+        assert mock_bedrock_client.count_tokens.call_count == 2
+
+        # Cache keys hold a digest, not the text itself
+        assert all("Test text" not in key for key in counter._count_tokens_cached._data)
+
+        # A third distinct text evicts the least recently used entry
+        counter.count_tokens("Other text", model_id)
+        counter.count_tokens("Third text", model_id)
+        info = counter.get_cache_info()
+        assert info['currsize'] == 2
+        assert info['maxsize'] == 2
+        assert info['hits'] == 1 and info['misses'] == 3
+
+        counter._count_tokens_cached.cache_clear()
+        assert counter.get_cache_info()['currsize'] == 0
+
+    @patch('boto3.client')
+    def test_count_tokens_same_object_skips_hashing(self, mock_client):
+        """Test that recounting the same string object does not rehash it."""
+        from ttok4bedrock import bedrock_counter
+        mock_bedrock_client = Mock()
+        mock_bedrock_client.count_tokens.return_value = {"inputTokens": 10}
+        mock_client.return_value = mock_bedrock_client
+        counter = BedrockTokenCounter()
+        model_id = "anthropic.claude-3-5-haiku-20241022-v1:0"
+        text = "Long document " * 100
+        
+        first = counter.count_tokens(text, model_id)
+        with patch.object(bedrock_counter, 'blake2b', wraps=bedrock_counter.blake2b) as digest:
+            assert counter.count_tokens(text, model_id) == first
+            digest.assert_not_called()
+            # An equal but distinct string goes through the digest cache
+            assert counter.count_tokens("".join(["Long document "] * 100), model_id) == first
+            digest.assert_called_once()
+        assert counter.get_cache_info()['hits'] == 2
+    
+    @patch('boto3.client')
+    def test_count_tokens_does_not_pin_large_texts(self, mock_client):
+        """Test that texts above the identity threshold are not kept alive."""
+        mock_bedrock_client = Mock()
+        mock_bedrock_client.count_tokens.return_value = {"inputTokens": 10}
+        mock_client.return_value = mock_bedrock_client
+        counter = BedrockTokenCounter()
+        model_id = "anthropic.claude-3-5-haiku-20241022-v1:0"
+        cache = counter._count_tokens_cached
+        
+        small = "small text"
+        counter.count_tokens(small, model_id)
+        large = "x" * (cache._IDENTITY_MAX_CHARS + 1)
+        counter.count_tokens(large, model_id)
+        
+        assert cache._last[0] is small
+    
     def test_count_tokens_unsupported_model_error(self):
         """Test that unsupported models raise ValueError."""
         counter = BedrockTokenCounter()
@@ -116,6 +282,21 @@ class TestBedrockTokenCounter:
         assert "is not supported" in str(exc_info.value)
         assert "Please use one of the supported Anthropic Claude models" in str(exc_info.value)
     
+    @patch('boto3.client')
+    def test_message_overhead_measured_once_per_model(self, mock_client):
+        """Test that the overhead probe is shared by all counters."""
+        mock_bedrock_client = Mock()
+        mock_bedrock_client.count_tokens.return_value = {"inputTokens": 8}
+        mock_client.return_value = mock_bedrock_client
+        model_id = "anthropic.claude-3-5-haiku-20241022-v1:0"
+        
+        first = BedrockTokenCounter()
+        assert first._get_message_overhead(model_id) == 7
+        assert BedrockTokenCounter()._get_message_overhead(model_id) == 7
+        assert mock_bedrock_client.count_tokens.call_count == 1
+        # The probe does not take a slot in the text LRU cache
+        assert first.get_cache_info()['misses'] == 0
+    
     @patch('boto3.client')
     def test_count_tokens_error_bubbles_up(self, mock_client):
         """Test that boto3 errors bubble up without modification."""
@@ -139,6 +320,25 @@ class TestBedrockTokenCounter:
         
         assert exc_info.value.response['Error']['Code'] == 'ValidationException'
     
+    @patch('boto3.client')
+    def test_empty_text_answered_locally(self, mock_client):
+        """Test that empty input and zero budgets never reach the API."""
+        mock_bedrock_client = Mock()
+        mock_client.return_value = mock_bedrock_client
+
+        counter = BedrockTokenCounter()
+        model_id = "anthropic.claude-3-5-haiku-20241022-v1:0"
+
+        assert counter.count_tokens("", model_id) == 0
+        assert counter.truncate("", 10, model_id) == ""
+        assert counter.truncate("Some text", 0, model_id, return_metadata=True) == (
+            "", {'api_calls': 0, 'final_token_count': 0}
+        )
+        mock_bedrock_client.count_tokens.assert_not_called()
+
+        with pytest.raises(ValueError):
+            counter.count_tokens("", "invalid-model")
+
     @patch('boto3.client')
     def test_truncate_no_truncation_needed(self, mock_client):
         """Test truncate when text is already short enough."""
@@ -151,7 +351,15 @@ class TestBedrockTokenCounter:
         result = counter.truncate("Short text", 20, "anthropic.claude-3-5-haiku-20241022-v1:0")
         
         assert result == "Short text"
-        # Should be called at least once (for overhead calculation and actual text)
+        # 10 bytes cannot exceed 20 tokens, so no API call is needed
+        assert mock_bedrock_client.count_tokens.call_count == 0
+        
+        # Metadata still reports the measured count
+        result, metadata = counter.truncate(
+            "Short text", 20, "anthropic.claude-3-5-haiku-20241022-v1:0", return_metadata=True
+        )
+        assert result == "Short text"
+        assert metadata['api_calls'] == 1
         assert mock_bedrock_client.count_tokens.call_count >= 1
     
     @patch('boto3.client')
@@ -160,23 +368,8 @@ class TestBedrockTokenCounter:
         mock_bedrock_client = Mock()
         
         # Simulate different token counts for different text lengths
-        def mock_count_tokens(modelId, input):
-            body = input.get("invokeModel", {}).get("body", "{}")
-            import json
-            parsed_body = json.loads(body) if isinstance(body, str) else body
-            
-            # Extract text length from the input
-            if "messages" in parsed_body:
-                content = parsed_body["messages"][0]["content"]
-            elif "inputText" in parsed_body:
-                content = parsed_body["inputText"]
-            else:
-                content = ""
-            
-            # Rough approximation: 4 chars = 1 token
-            return {"inputTokens": max(1, len(content) // 4)}
-        
-        mock_bedrock_client.count_tokens.side_effect = mock_count_tokens
+        # Rough approximation: 4 chars = 1 token
+        mock_bedrock_client.count_tokens.side_effect = fake_count_tokens(lambda content: len(content) // 4)
         mock_client.return_value = mock_bedrock_client
         
         counter = BedrockTokenCounter()
@@ -196,16 +389,8 @@ class TestBedrockTokenCounter:
         """Test that truncation is efficient with minimal API calls."""
         mock_bedrock_client = Mock()
         
-        # Simulate realistic token counting
-        def mock_count_tokens(modelId, input):
-            body = input.get("invokeModel", {}).get("body", "{}")
-            import json
-            parsed_body = json.loads(body) if isinstance(body, str) else body
-            content = parsed_body.get("messages", [{}])[0].get("content", "")
-            # Realistic approximation: 3.5 chars per token on average
-            return {"inputTokens": max(1, int(len(content) / 3.5))}
-        
-        mock_bedrock_client.count_tokens.side_effect = mock_count_tokens
+        # Simulate realistic token counting: 3.5 chars per token on average
+        mock_bedrock_client.count_tokens.side_effect = fake_count_tokens(lambda content: int(len(content) / 3.5))
         mock_client.return_value = mock_bedrock_client
         
         counter = BedrockTokenCounter()
@@ -225,16 +410,8 @@ class TestBedrockTokenCounter:
         """Test truncation efficiency with 100-token text."""
         mock_bedrock_client = Mock()
         
-        # Simulate realistic token counting
-        def mock_count_tokens(modelId, input):
-            body = input.get("invokeModel", {}).get("body", "{}")
-            import json
-            parsed_body = json.loads(body) if isinstance(body, str) else body
-            content = parsed_body.get("messages", [{}])[0].get("content", "")
-            # Realistic approximation: 3.5 chars per token on average
-            return {"inputTokens": max(1, int(len(content) / 3.5))}
-        
-        mock_bedrock_client.count_tokens.side_effect = mock_count_tokens
+        # Simulate realistic token counting: 3.5 chars per token on average
+        mock_bedrock_client.count_tokens.side_effect = fake_count_tokens(lambda content: int(len(content) / 3.5))
         mock_client.return_value = mock_bedrock_client
         
         counter = BedrockTokenCounter()
@@ -258,16 +435,8 @@ class TestBedrockTokenCounter:
         """Test truncation efficiency with 1000-token text."""
         mock_bedrock_client = Mock()
         
-        # Simulate realistic token counting
-        def mock_count_tokens(modelId, input):
-            body = input.get("invokeModel", {}).get("body", "{}")
-            import json
-            parsed_body = json.loads(body) if isinstance(body, str) else body
-            content = parsed_body.get("messages", [{}])[0].get("content", "")
-            # Realistic approximation: 3.5 chars per token on average
-            return {"inputTokens": max(1, int(len(content) / 3.5))}
-        
-        mock_bedrock_client.count_tokens.side_effect = mock_count_tokens
+        # Simulate realistic token counting: 3.5 chars per token on average
+        mock_bedrock_client.count_tokens.side_effect = fake_count_tokens(lambda content: int(len(content) / 3.5))
         mock_client.return_value = mock_bedrock_client
         
         counter = BedrockTokenCounter()
@@ -291,16 +460,8 @@ class TestBedrockTokenCounter:
         """Test truncation with extreme case: very long text to very few tokens."""
         mock_bedrock_client = Mock()
         
-        # Simulate realistic token counting
-        def mock_count_tokens(modelId, input):
-            body = input.get("invokeModel", {}).get("body", "{}")
-            import json
-            parsed_body = json.loads(body) if isinstance(body, str) else body
-            content = parsed_body.get("messages", [{}])[0].get("content", "")
-            # Realistic approximation: 3.5 chars per token on average
-            return {"inputTokens": max(1, int(len(content) / 3.5))}
-        
-        mock_bedrock_client.count_tokens.side_effect = mock_count_tokens
+        # Simulate realistic token counting: 3.5 chars per token on average
+        mock_bedrock_client.count_tokens.side_effect = fake_count_tokens(lambda content: int(len(content) / 3.5))
         mock_client.return_value = mock_bedrock_client
         
         counter = BedrockTokenCounter()
@@ -318,6 +479,104 @@ class TestBedrockTokenCounter:
         # Result should be very small (only 10 tokens)
         assert len(result) < len(long_text) * 0.05  # Less than 5% of original
     
+    @pytest.mark.parametrize("max_workers", [1, 4])
+    @patch('boto3.client')
+    def test_truncate_returns_longest_fitting_prefix(self, mock_client, max_workers):
+        """Test that truncation finds the exact cut point for every budget."""
+        mock_bedrock_client = Mock()
+
+        # One token per word, with no message overhead
+        mock_bedrock_client.count_tokens.side_effect = fake_count_tokens(lambda content: len(content.split()))
+        mock_client.return_value = mock_bedrock_client
+
+        counter = BedrockTokenCounter(max_workers=max_workers)
+        text = "alpha beta gamma delta epsilon zeta eta theta iota kappa"
+        word_starts = [i for i, c in enumerate(text) if c != " " and (i == 0 or text[i - 1] == " ")]
+
+        for max_tokens in range(1, 10):
+            result, metadata = counter.truncate(
+                text, max_tokens, "anthropic.claude-3-5-haiku-20241022-v1:0", return_metadata=True
+            )
+            # Everything up to (not including) the first letter of the next word
+            expected = text[:word_starts[max_tokens]]
+            assert result == expected
+            assert metadata['final_token_count'] == max_tokens
+
+        # Prefix probes bypass the LRU cache; only the full text is cached
+        assert counter.get_cache_info()['currsize'] == 1
+
+    @pytest.mark.parametrize("max_tokens", [20, 37, 60])
+    @pytest.mark.parametrize("max_workers", [1, 4])
+    @patch('boto3.client')
+    def test_truncate_metadata_counts_every_api_call(self, mock_client, max_workers, max_tokens):
+        """Test that api_calls matches the calls actually made."""
+        mock_bedrock_client = Mock()
+
+        # One token per character, with no message overhead
+        mock_bedrock_client.count_tokens.side_effect = fake_count_tokens(len)
+        mock_client.return_value = mock_bedrock_client
+
+        counter = BedrockTokenCounter(max_workers=max_workers)
+        text = "x" * 100
+        result, metadata = counter.truncate(
+            text, max_tokens, "anthropic.claude-3-5-haiku-20241022-v1:0", return_metadata=True
+        )
+
+        assert result == text[:max_tokens]
+        assert metadata['final_token_count'] == max_tokens
+        # Every call except the overhead probe is reported
+        assert metadata['api_calls'] == mock_bedrock_client.count_tokens.call_count - 1
+
+    @pytest.mark.parametrize("max_workers", [1, 4])
+    @patch('boto3.client')
+    def test_truncate_gallops_from_a_poor_estimate(self, mock_client, max_workers):
+        """Test that the cut point is found when the estimate is far off."""
+        mock_bedrock_client = Mock()
+
+        # One token per word; short words first, so the average ratio misleads
+        mock_bedrock_client.count_tokens.side_effect = fake_count_tokens(lambda content: len(content.split()))
+        mock_client.return_value = mock_bedrock_client
+
+        counter = BedrockTokenCounter(max_workers=max_workers)
+        text = " ".join(["a"] * 200 + ["x" * 200] * 5)
+        word_starts = [i for i, c in enumerate(text) if c != " " and (i == 0 or text[i - 1] == " ")]
+
+        for max_tokens in (50, 150, 202):
+            result = counter.truncate(text, max_tokens, "anthropic.claude-3-5-haiku-20241022-v1:0")
+            assert result == text[:word_starts[max_tokens]]
+
+    @patch('boto3.client')
+    def test_truncate_after_close(self, mock_client):
+        """Test that a closed counter still truncates, probing serially."""
+        mock_bedrock_client = Mock()
+        mock_bedrock_client.count_tokens.side_effect = fake_count_tokens(lambda content: len(content.split()))
+        mock_client.return_value = mock_bedrock_client
+
+        counter = BedrockTokenCounter(max_workers=4)
+        counter.close()
+        counter.close()  # closing twice is harmless
+        text = "alpha beta gamma delta epsilon zeta eta theta iota kappa"
+
+        assert counter.truncate(text, 3, "anthropic.claude-3-5-haiku-20241022-v1:0") == "alpha beta gamma "
+
+    @patch('boto3.client')
+    def test_truncate_many(self, mock_client):
+        """Test that batch truncation matches one-by-one truncation, in order."""
+        mock_bedrock_client = Mock()
+
+        # One token per word, with no message overhead
+        mock_bedrock_client.count_tokens.side_effect = fake_count_tokens(lambda content: len(content.split()))
+        mock_client.return_value = mock_bedrock_client
+
+        model_id = "anthropic.claude-3-5-haiku-20241022-v1:0"
+        texts = [" ".join(["word%d" % i] * n) for i, n in enumerate([1, 5, 12, 30, 3])]
+
+        results = BedrockTokenCounter().truncate_many(texts, 4, model_id)
+        expected = [BedrockTokenCounter().truncate(text, 4, model_id) for text in texts]
+
+        assert results == expected
+        assert BedrockTokenCounter().truncate_many([], 4, model_id) == []
+
     def test_truncate_systematic_range_real_api(self):
         """Test truncation systematically from 1 token up to full length + 1 using real Bedrock API."""
         # This test requires real AWS credentials and will make actual API calls
@@ -478,6 +737,107 @@ class TestBedrockTokenCounter:
             pytest.skip(f"Skipping real API test - AWS credentials not available: {e}")
 
 
+class TestDiskCache:
+    """Test the persistent token count cache."""
+    
+    def test_round_trip(self, tmp_path):
+        """Test that counts persist across cache instances."""
+        path = tmp_path / "counts.db"
+        cache = DiskCache(path)
+        assert cache.get("Hello", "model-a") is None
+        cache.put("Hello", "model-a", 9)
+        cache.close()
+        
+        reopened = DiskCache(path, mode="read-only")
+        assert reopened.get("Hello", "model-a") == 9
+        assert reopened.get("Hello", "model-b") is None
+        reopened.put("Other", "model-a", 3)  # ignored in read-only mode
+        assert reopened.get("Other", "model-a") is None
+        reopened.close()
+    
+    def test_keeps_most_recently_used_rows(self, tmp_path, monkeypatch):
+        """Test that reopening trims the cache to its least recently used rows."""
+        from ttok4bedrock import _cache
+        clock = iter(range(100))
+        monkeypatch.setattr(_cache.time, "time", lambda: next(clock))
+        path = tmp_path / "counts.db"
+        
+        cache = DiskCache(path, max_rows=2)
+        for text in ("one", "two", "three"):
+            cache.put(text, "model-a", 1)
+        assert cache.get("one", "model-a") == 1  # refreshes "one"
+        cache.close()
+        
+        reopened = DiskCache(path, max_rows=2)
+        assert reopened.get("two", "model-a") is None
+        assert reopened.get("one", "model-a") == 1
+        assert reopened.get("three", "model-a") == 1
+        reopened.close()
+    
+    def test_old_schema_is_rebuilt(self, tmp_path):
+        """Test that a database from an older layout is replaced, not misread."""
+        import sqlite3
+        path = tmp_path / "counts.db"
+        conn = sqlite3.connect(str(path))
+        conn.execute("CREATE TABLE counts (key BLOB PRIMARY KEY, tokens INTEGER NOT NULL, "
+                     "created_at INTEGER NOT NULL)")
+        conn.commit()
+        conn.close()
+        
+        cache = DiskCache(path)
+        cache.put("Hello", "model-a", 9)
+        assert cache.get("Hello", "model-a") == 9
+        cache.close()
+    
+    def test_failed_open_closes_connection(self, tmp_path, monkeypatch):
+        """Test that a connection whose setup fails is closed, not leaked."""
+        import sqlite3
+        from ttok4bedrock import _cache
+        conn = MagicMock()
+        conn.execute.side_effect = sqlite3.OperationalError("database is locked")
+        monkeypatch.setattr(_cache.sqlite3, "connect", lambda *args, **kwargs: conn)
+        
+        cache = DiskCache(tmp_path / "counts.db")
+        conn.close.assert_called_once()
+        assert cache.get("Hello", "model-a") is None
+    
+    def test_default_path_follows_xdg(self, tmp_path, monkeypatch):
+        """Test that the default location honours XDG_CACHE_HOME."""
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        assert default_cache_path() == tmp_path / "ttok4bedrock" / "counts.db"
+    
+    def test_missing_database_is_a_miss(self, tmp_path):
+        """Test that a read-only cache without a database just misses."""
+        cache = DiskCache(tmp_path / "absent.db", mode="read-only")
+        assert cache.get("Hello", "model-a") is None
+    
+    @patch('boto3.client')
+    def test_counter_uses_disk_cache(self, mock_client, tmp_path):
+        """Test that a second counter is served from disk without API calls."""
+        mock_bedrock_client = Mock()
+        mock_bedrock_client.count_tokens.return_value = {"inputTokens": 12}
+        mock_client.return_value = mock_bedrock_client
+        model_id = "anthropic.claude-3-5-haiku-20241022-v1:0"
+        path = tmp_path / "counts.db"
+        
+        first = BedrockTokenCounter(disk_cache=DiskCache(path))
+        first.count_tokens("Test text", model_id)
+        calls = mock_bedrock_client.count_tokens.call_count
+        
+        second = BedrockTokenCounter(disk_cache=DiskCache(path, mode="replay"))
+        # A disk hit never builds the request body
+        with patch.object(second, '_format_input_for_model') as mock_format:
+            assert second.count_tokens("Test text", model_id) == first.count_tokens("Test text", model_id)
+        mock_format.assert_not_called()
+        assert mock_bedrock_client.count_tokens.call_count == calls
+        
+        with pytest.raises(ValueError):
+            second.count_tokens("Test text", "unsupported-model")
+        
+        with pytest.raises(LookupError):
+            second.count_tokens("Never counted", model_id)
+
+
 class TestPublicAPI:
     """Test the public API functions."""
     
@@ -504,6 +864,19 @@ class TestPublicAPI:
         
         assert result == 30
     
+    @patch('ttok4bedrock.bedrock_counter.BedrockTokenCounter.count_tokens')
+    def test_functions_reuse_counter(self, mock_count):
+        """Test that repeated calls share one counter per region."""
+        mock_count.return_value = 5
+        
+        count_tokens("One", "anthropic.claude-3-5-haiku-20241022-v1:0")
+        count_tokens("Two", "anthropic.claude-3-5-haiku-20241022-v1:0")
+        count_tokens("Three", "anthropic.claude-3-5-haiku-20241022-v1:0", aws_region="eu-west-1")
+        
+        assert _get_counter(None) is _get_counter(None)
+        assert _get_counter(None) is not _get_counter("eu-west-1")
+        assert _get_counter.cache_info().misses == 2
+    
     @patch('ttok4bedrock.bedrock_counter.BedrockTokenCounter.truncate')
     def test_truncate_function(self, mock_truncate):
         """Test the public truncate function."""
@@ -586,19 +959,57 @@ class TestCLI:
         assert result.exit_code == 0
         assert result.output.strip() == "25"
     
-    @patch('ttok4bedrock.bedrock_counter.BedrockTokenCounter.count_tokens')
-    def test_cli_stdin_input(self, mock_count):
-        """Test reading from stdin."""
+    @patch('boto3.client')
+    def test_cli_stdin_input(self, mock_client):
+        """Test reading from stdin (the overhead is measured in the background)."""
         from click.testing import CliRunner
         from ttok4bedrock.cli import cli
         
-        mock_count.return_value = 30
+        mock_client.return_value.count_tokens.return_value = {"inputTokens": 8}
         
         runner = CliRunner()
-        result = runner.invoke(cli, [], input="Input from stdin")
+        result = runner.invoke(cli, ['--no-cache'], input="Input from stdin")
         
         assert result.exit_code == 0
-        assert result.output.strip() == "30"
+        assert result.output.strip() == "1"
+        # One overhead probe (background or not) and one count of the text
+        assert mock_client.return_value.count_tokens.call_count == 2
+    
+    @patch('boto3.client')
+    def test_cli_short_truncate_does_not_wait_for_probe(self, mock_client):
+        """Test that an API-free truncation does not wait on the warm-up probe."""
+        import threading
+        from click.testing import CliRunner
+        from ttok4bedrock.cli import cli
+        
+        entered = threading.Event()
+        release = threading.Event()
+        finished = threading.Event()
+        probe_threads = []
+        
+        def blocked_count_tokens(**kwargs):
+            probe_threads.append(threading.current_thread())
+            entered.set()
+            release.wait(10)
+            finished.set()
+            return {"inputTokens": 8}
+        mock_client.return_value.count_tokens.side_effect = blocked_count_tokens
+        
+        runner = CliRunner()
+        try:
+            result = runner.invoke(cli, ['--no-cache', '-t', '100'], input="hi there")
+            
+            assert result.exit_code == 0
+            assert result.output == "hi there"
+            # The warm-up probe was sent and the CLI returned while it was blocked
+            assert entered.wait(5)
+            assert not finished.is_set()
+        finally:
+            # Let the probe finish before the fixture clears the shared overhead
+            release.set()
+            for thread in probe_threads:
+                thread.join(5)
+        assert not any(thread.is_alive() for thread in probe_threads)
     
     @patch('boto3.client')
     def test_cli_error_handling(self, mock_client):
@@ -626,6 +1037,82 @@ class TestCLI:
         assert "ValidationException" in result.output
         assert "Model not found" in result.output
     
+    @patch('boto3.client')
+    def test_cli_cache_modes(self, mock_client):
+        """Test that the CLI reuses cached counts and honours --no-cache."""
+        from click.testing import CliRunner
+        from ttok4bedrock.cli import cli
+        
+        mock_bedrock_client = Mock()
+        mock_bedrock_client.count_tokens.return_value = {"inputTokens": 12}
+        mock_client.return_value = mock_bedrock_client
+        
+        runner = CliRunner()
+        assert runner.invoke(cli, ['cached', 'text']).exit_code == 0
+        calls = mock_bedrock_client.count_tokens.call_count
+        assert calls > 0
+        
+        result = runner.invoke(cli, ['--cache-mode', 'replay', 'cached', 'text'])
+        assert result.exit_code == 0
+        assert mock_bedrock_client.count_tokens.call_count == calls
+        
+        result = runner.invoke(cli, ['--no-cache', 'cached', 'text'])
+        assert result.exit_code == 0
+        assert mock_bedrock_client.count_tokens.call_count > calls
+    
+    @patch('boto3.client')
+    @patch('ttok4bedrock.bedrock_counter.BedrockTokenCounter.truncate')
+    def test_cli_truncate_stops_reading_large_input(self, mock_truncate, mock_client, tmp_path):
+        """Test that truncation reads only as much input as it could keep."""
+        from click.testing import CliRunner
+        from ttok4bedrock.cli import cli, MAX_CHARS_PER_TOKEN
+        
+        mock_truncate.side_effect = lambda text, max_tokens, model_id: text[:10]
+        mock_client.return_value.count_tokens.return_value = {"inputTokens": 8}
+        big_input = "word " * 200_000
+        
+        runner = CliRunner()
+        result = runner.invoke(cli, ['-t', '10'], input=big_input)
+        
+        assert result.exit_code == 0
+        text = mock_truncate.call_args[0][0]
+        assert 10 * MAX_CHARS_PER_TOKEN < len(text) < len(big_input)
+        assert big_input.startswith(text)
+        
+        # The prompt is dropped after a cut-short input, appended otherwise
+        big_file = tmp_path / "big.txt"
+        big_file.write_text(big_input)
+        result = runner.invoke(cli, ['-t', '10', '-i', str(big_file), 'suffix'])
+        assert result.exit_code == 0
+        assert not mock_truncate.call_args[0][0].endswith("suffix")
+        
+        # If everything read fits after all, the rest is read and truncated
+        mock_truncate.side_effect = lambda text, max_tokens, model_id: text
+        result = runner.invoke(cli, ['-t', '10', '-i', str(big_file), 'suffix'])
+        assert result.exit_code == 0
+        assert mock_truncate.call_args[0][0] == big_input + " suffix"
+        assert result.output == big_input + " suffix"
+        
+        small_file = tmp_path / "small.txt"
+        small_file.write_text("short input")
+        result = runner.invoke(cli, ['-t', '10', '-i', str(small_file), 'suffix'])
+        assert result.exit_code == 0
+        assert mock_truncate.call_args[0][0] == "short input suffix"
+    
+    def test_cli_import_defers_boto3(self):
+        """Test that importing the CLI does not import boto3."""
+        import os
+        import subprocess
+        import sys
+        import ttok4bedrock
+        
+        # Run from the project root so the import works wherever pytest is started
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(ttok4bedrock.__file__)))
+        code = "import sys, ttok4bedrock.cli; print('boto3' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                check=True, cwd=project_root)
+        assert output.stdout.strip() == "False"
+    
     def test_cli_unsupported_model_error(self):
         """Test that unsupported models show clear error message."""
         from click.testing import CliRunner
@@ -3,13 +3,20 @@ ttok4bedrock - Token counting for Amazon Bedrock models
 Drop-in replacement for ttok with Amazon Bedrock support
 """
 
+from functools import lru_cache
 from typing import Union, List, Optional
-import boto3
-from botocore.exceptions import ClientError
-import json
+
+from ._cache import DiskCache
 
 __version__ = "0.1.0"
-__all__ = ["count_tokens", "truncate"]
+__all__ = ["count_tokens", "truncate", "DiskCache"]
+
+
+@lru_cache(maxsize=4)
+def _get_counter(aws_region: Optional[str]):
+    """Counter shared by the module-level functions, one per region."""
+    from .bedrock_counter import BedrockTokenCounter
+    return BedrockTokenCounter(region=aws_region)
 
 
 def count_tokens(
@@ -42,9 +49,7 @@ def count_tokens(
     Returns:
         Token count as integer
     """
-    from .bedrock_counter import BedrockTokenCounter
-    counter = BedrockTokenCounter(region=aws_region)
-    return counter.count_tokens(text, model)
+    return _get_counter(aws_region).count_tokens(text, model)
 
 
 def truncate(
@@ -79,7 +84,5 @@ def truncate(
     Returns:
         Truncated text string
     """
-    from .bedrock_counter import BedrockTokenCounter
-    counter = BedrockTokenCounter(region=aws_region)
-    return counter.truncate(text, max_tokens, model)
+    return _get_counter(aws_region).truncate(text, max_tokens, model)
 
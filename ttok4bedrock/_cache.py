@@ -0,0 +1,131 @@
+"""
+Persistent token count cache shared across CLI invocations.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Optional, Union
+
+# Cache modes accepted by DiskCache ("disabled" means not creating one at all)
+CACHE_MODES = ("enabled", "read-only", "replay", "disabled")
+
+# Bumped whenever the table layout changes; older databases are rebuilt
+_SCHEMA_VERSION = 2
+
+
+def default_cache_path() -> Path:
+    """Location of the cache database, following the XDG base directory spec."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(cache_home) / "ttok4bedrock" / "counts.db"
+
+
+class DiskCache:
+    """
+    SQLite cache of raw CountTokens results keyed by SHA-256 of model and text.
+
+    Modes:
+        enabled: read cached counts and store new ones
+        read-only: read cached counts, never write
+        replay: like read-only, and callers must not fall back to the API
+
+    In "enabled" mode every hit refreshes the entry's last-used time, and
+    opening the cache trims it to the max_rows most recently used entries.
+
+    A cache must never break counting, so database errors are treated as
+    misses and writes are skipped.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, mode: str = "enabled",
+                 max_rows: int = 100_000):
+        if mode not in CACHE_MODES or mode == "disabled":
+            raise ValueError(f"Invalid cache mode: {mode}")
+        self.path = Path(path) if path is not None else default_cache_path()
+        self.mode = mode
+        self.max_rows = max_rows
+        self._lock = Lock()
+        self._conn = self._connect()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        conn: Optional[sqlite3.Connection] = None
+        try:
+            if self.mode == "enabled":
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(self.path), check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                # A lost write after a power failure only costs a recount
+                conn.execute("PRAGMA synchronous=NORMAL")
+                if conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                    conn.execute("DROP TABLE IF EXISTS counts")
+                    conn.execute(
+                        "CREATE TABLE counts (key BLOB PRIMARY KEY, tokens INTEGER NOT NULL, "
+                        "created_at INTEGER NOT NULL, last_used INTEGER NOT NULL)"
+                    )
+                    conn.execute("CREATE INDEX counts_last_used ON counts (last_used)")
+                    conn.execute(f"PRAGMA user_version={_SCHEMA_VERSION}")
+                conn.execute(
+                    "DELETE FROM counts WHERE key IN ("
+                    "SELECT key FROM counts ORDER BY last_used DESC, rowid DESC LIMIT -1 OFFSET ?)",
+                    (self.max_rows,),
+                )
+                conn.commit()
+            else:
+                conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            return conn
+        except (sqlite3.Error, OSError):
+            # e.g. "database is locked" while another run holds the file
+            if conn is not None:
+                conn.close()
+            return None
+
+    @staticmethod
+    def _key(text: str, model_id: str) -> bytes:
+        # Model IDs never contain NUL, so the concatenation is unambiguous
+        return hashlib.sha256(
+            model_id.encode("utf-8") + b"\0" + text.encode("utf-8", "surrogatepass")
+        ).digest()
+
+    def get(self, text: str, model_id: str) -> Optional[int]:
+        """Return the cached raw token count, or None on a miss."""
+        key = self._key(text, model_id)
+        try:
+            with self._lock:
+                # Checked under the lock: close() may run on another thread
+                if self._conn is None:
+                    return None
+                row = self._conn.execute("SELECT tokens FROM counts WHERE key = ?", (key,)).fetchone()
+                if row and self.mode == "enabled":
+                    self._conn.execute(
+                        "UPDATE counts SET last_used = ? WHERE key = ?", (int(time.time()), key)
+                    )
+                    self._conn.commit()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def put(self, text: str, model_id: str, tokens: int) -> None:
+        """Store a raw token count (only in "enabled" mode)."""
+        if self.mode != "enabled":
+            return
+        try:
+            with self._lock:
+                if self._conn is None:
+                    return
+                now = int(time.time())
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO counts (key, tokens, created_at, last_used) VALUES (?, ?, ?, ?)",
+                    (self._key(text, model_id), tokens, now, now),
+                )
+                self._conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
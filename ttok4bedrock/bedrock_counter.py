@@ -2,11 +2,194 @@
 Core Bedrock token counting implementation.
 """
 
-import boto3
-from botocore.exceptions import ClientError
 import json
-from typing import Optional, Dict, Any
-from functools import lru_cache
+from bisect import bisect_right
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Executor, ThreadPoolExecutor
+from hashlib import blake2b
+from threading import Lock
+from typing import Callable, Iterable, List, Optional, Dict, Any, Tuple
+
+from ._cache import DiskCache
+
+try:
+    import orjson
+except ImportError:  # optional speedup, see the "fast" extra
+    orjson = None  # type: ignore[assignment]
+
+
+# Request body for Claude models; only the JSON-encoded user content varies.
+# Kept as bytes: the body is a blob, so botocore sends bytes without re-encoding.
+_CLAUDE_BODY_TEMPLATE = (
+    b'{"anthropic_version":"bedrock-2023-05-31",'
+    b'"messages":[{"role":"user","content":%s}],'
+    b'"max_tokens":1}'
+)
+
+
+def _json_bytes(text: str) -> bytes:
+    """JSON-encode a string to UTF-8 bytes, using orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(text)
+        except orjson.JSONEncodeError:
+            pass  # lone surrogates - json.dumps escapes them
+    return json.dumps(text).encode("ascii")
+
+
+_CacheInfo = namedtuple("_CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+# Bedrock runtime clients shared by every counter, keyed by region and pool size
+_CLIENT_CACHE: Dict[Tuple[Optional[str], int], Any] = {}
+_client_lock = Lock()
+
+
+def _get_client(region: Optional[str], max_pool_connections: int = 50):
+    """
+    Get the Bedrock runtime client for a region, shared across counters.
+    
+    Building a client loads the service model and resolves credentials and
+    endpoints, so it is done once per region and reused by every instance
+    (boto3 clients are thread-safe). Keep-alive connections let the many
+    small CountTokens calls made by truncate reuse one TLS session.
+    """
+    # Imported here: boto3 takes a noticeable part of a second to import, and
+    # nothing before the first API call needs it
+    import boto3
+    from botocore.config import Config
+    
+    key = (region, max_pool_connections)
+    # Check and build under one lock so concurrent first calls build a single
+    # client (boto3's default session is not safe to build from concurrently)
+    with _client_lock:
+        client = _CLIENT_CACHE.get(key)
+        if client is None:
+            config = Config(
+                max_pool_connections=max_pool_connections,
+                tcp_keepalive=True,
+                retries={'max_attempts': 5, 'mode': 'adaptive'},
+                connect_timeout=3,
+                read_timeout=30,
+            )
+            client_kwargs = {'service_name': 'bedrock-runtime', 'config': config}
+            if region:
+                client_kwargs['region_name'] = region
+            client = _CLIENT_CACHE[key] = boto3.client(**client_kwargs)
+        return client
+
+
+class _TokenCountCache:
+    """
+    LRU cache of token counts keyed by a digest of the text.
+    
+    Keys are a 64-bit BLAKE2b digest (as an int) plus the model ID, so long
+    texts (and the many prefixes probed by truncate) are not kept alive by
+    the cache; collisions are negligible at in-memory cache sizes.
+    Mirrors the cache_info()/cache_clear() interface of functools.lru_cache.
+    Safe to call from several threads; the wrapped function runs unlocked.
+    
+    The most recent call is also remembered by identity, so counting the same
+    string object again (e.g. count_tokens then truncate) skips hashing it.
+    That keeps one recent text alive for as long as the cache lives, which is
+    the whole process for the module-level functions, so only texts of up to
+    _IDENTITY_MAX_CHARS characters are remembered this way.
+    """
+    
+    _IDENTITY_MAX_CHARS = 1 << 16
+    
+    def __init__(self, func: Callable[[str, str], int], maxsize: int):
+        self._func = func
+        self._maxsize = maxsize
+        self._data: "OrderedDict[tuple, int]" = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._last: Optional[tuple] = None  # (text, model_id, value)
+    
+    def __call__(self, text: str, model_id: str) -> int:
+        last = self._last
+        if last is not None and last[0] is text and last[1] == model_id:
+            with self._lock:
+                self._hits += 1
+            return last[2]
+        digest = blake2b(text.encode("utf-8", "surrogatepass"), digest_size=8).digest()
+        key = (int.from_bytes(digest, "little"), model_id)
+        with self._lock:
+            if key in self._data:
+                self._hits += 1
+                self._data.move_to_end(key)
+                value = self._data[key]
+                self._remember(text, model_id, value)
+                return value
+            self._misses += 1
+        value = self._func(text, model_id)
+        with self._lock:
+            self._data[key] = value
+            if len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+            self._remember(text, model_id, value)
+        return value
+    
+    def _remember(self, text: str, model_id: str, value: int) -> None:
+        # Called with the lock held
+        if len(text) <= self._IDENTITY_MAX_CHARS:
+            self._last = (text, model_id, value)
+    
+    def cache_info(self) -> _CacheInfo:
+        with self._lock:
+            return _CacheInfo(self._hits, self._misses, self._maxsize, len(self._data))
+    
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._last = None
+            self._hits = 0
+            self._misses = 0
+
+
+class _PrefixTokenCounts:
+    """
+    Lazy sequence of token counts for the prefixes of a text.
+    
+    Item n is the token count of text[:n]. Counts never decrease as the
+    prefix grows, so the sequence is sorted and bisect can search it
+    directly; each item is counted on first access and memoized, so no
+    prefix is ever probed twice.
+    """
+    
+    def __init__(self, count: Callable[[str], int], text: str):
+        self._count = count
+        self._text = text
+        self._known: Dict[int, int] = {0: 0}
+        self.probes = 0
+    
+    def seed(self, length: int, count: int) -> None:
+        """Record a count that is already known."""
+        self._known[length] = count
+    
+    def known(self, length: int) -> bool:
+        """Whether the count for text[:length] is already available."""
+        return length in self._known
+    
+    def prefetch(self, lengths: Iterable[int], executor: Executor) -> None:
+        """Count several prefixes concurrently so later lookups are memo hits."""
+        missing = sorted(set(lengths).difference(self._known))
+        text = self._text
+        for length, count in zip(missing, executor.map(lambda n: self._count(text[:n]), missing)):
+            self._known[length] = count
+            self.probes += 1
+    
+    def __len__(self) -> int:
+        return len(self._text) + 1
+    
+    def __getitem__(self, length: int) -> int:
+        try:
+            return self._known[length]
+        except KeyError:
+            count = self._known[length] = self._count(self._text[:length])
+            self.probes += 1
+            return count
 
 
 class BedrockTokenCounter:
@@ -27,47 +210,93 @@ class BedrockTokenCounter:
         "anthropic.claude-3-5-sonnet-20240620-v1:0",
         "anthropic.claude-3-5-haiku-20241022-v1:0",
     ]
+    # Hashed lookup for the check done on every count and truncate probe
+    _SUPPORTED_MODEL_IDS = frozenset(SUPPORTED_MODELS)
     
-    def __init__(self, region: Optional[str] = None, cache_size: int = 1000):
+    # Message structure overhead per model ID, see _get_message_overhead
+    _message_overhead: Dict[str, int] = {}
+    _overhead_lock = Lock()
+    
+    def __init__(self, region: Optional[str] = None, cache_size: int = 1000,
+                 max_pool_connections: int = 50, max_workers: int = 4,
+                 disk_cache: Optional[DiskCache] = None):
         """
         Initialize Bedrock token counter.
         
         Args:
             region: AWS region (uses default if not specified)
             cache_size: Maximum number of token counts to cache (LRU)
+            max_pool_connections: Size of the client's HTTP connection pool
+            max_workers: Concurrent CountTokens calls per truncate search round
+                (1 searches serially)
+            disk_cache: Optional persistent cache consulted before the API
         """
         self.region = region
+        self.max_pool_connections = max_pool_connections
         self._client = None
         self._cache_size = cache_size
+        self._max_workers = max_workers
+        self._disk_cache = disk_cache
+        # Threads are only started on first use, so this is cheap for count-only use
+        self._executor = ThreadPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
         # Create LRU-cached version of _count_tokens_impl
-        self._count_tokens_cached = lru_cache(maxsize=cache_size)(self._count_tokens_impl)
+        self._count_tokens_cached = _TokenCountCache(self._count_tokens_impl, cache_size)
+    
+    def close(self) -> None:
+        """
+        Release the worker threads used for concurrent truncate probes.
+        The counter stays usable; truncate falls back to serial probing.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
     
     @property
     def client(self):
-        """Lazy initialization of Bedrock client."""
+        """Lazy initialization of Bedrock client (shared per region)."""
         if self._client is None:
-            client_kwargs = {'service_name': 'bedrock-runtime'}
-            if self.region:
-                client_kwargs['region_name'] = self.region
-            self._client = boto3.client(**client_kwargs)
+            self._client = _get_client(self.region, self.max_pool_connections)
         return self._client
     
     def _get_message_overhead(self, model_id: str) -> int:
         """
         Calculate the token overhead of the message structure.
-        Uses the same LRU cache as regular token counting.
+        Measured once per model and shared by all counters in the process
+        (the envelope is fixed, so the overhead depends only on the model).
         """
-        # Use a minimal text to calculate overhead - this will be cached by LRU
-        minimal_text = "A"
-        raw_count = self._count_tokens_cached(minimal_text, model_id)
-        # The overhead is the raw count minus 1 (for the "A" character)
-        return raw_count - 1
+        overhead = self._message_overhead.get(model_id)
+        if overhead is None:
+            # Callers that arrive while a probe is in flight (e.g. the CLI's
+            # background warm-up) wait for it instead of sending another
+            with self._overhead_lock:
+                overhead = self._message_overhead.get(model_id)
+                if overhead is None:
+                    # Use a minimal text to calculate overhead (the disk cache,
+                    # if any, keeps this probe across processes)
+                    minimal_text = "A"
+                    raw_count = self._count_tokens_impl(minimal_text, model_id)
+                    # The overhead is the raw count minus 1 (for the "A" character)
+                    overhead = self._message_overhead[model_id] = raw_count - 1
+        return overhead
     
     def _count_tokens_impl(self, text: str, model_id: str) -> int:
         """
-        Internal implementation of token counting (without caching).
-        This method is wrapped with lru_cache in __init__.
+        Internal implementation of token counting (without in-memory caching).
+        This method is wrapped with an LRU cache in __init__; the optional
+        disk cache is consulted before calling the API.
         """
+        if self._disk_cache is not None:
+            self._check_model_supported(model_id)
+            cached = self._disk_cache.get(text, model_id)
+            if cached is not None:
+                return cached
+            if self._disk_cache.mode == "replay":
+                raise LookupError(
+                    f"No cached token count for this text with model {model_id} "
+                    f"(cache mode is 'replay')"
+                )
+        
+        # Only encode the request body once it is going to be sent
         input_data = self._format_input_for_model(text, model_id)
         
         # Call Bedrock CountTokens API - let errors bubble up
@@ -76,7 +305,10 @@ class BedrockTokenCounter:
             input=input_data
         )
         
-        return response.get("inputTokens", 0)
+        tokens = response.get("inputTokens", 0)
+        if self._disk_cache is not None:
+            self._disk_cache.put(text, model_id, tokens)
+        return tokens
     
     @classmethod
     def get_supported_models(cls) -> list[str]:
@@ -88,6 +320,21 @@ class BedrockTokenCounter:
         """
         return cls.SUPPORTED_MODELS.copy()
     
+    def _check_model_supported(self, model_id: str) -> None:
+        """
+        Raise ValueError unless the model supports the CountTokens API.
+        
+        Args:
+            model_id: Full Bedrock model ID
+        """
+        # Only support Anthropic Claude models that support CountTokens API
+        if model_id not in self._SUPPORTED_MODEL_IDS:
+            models_list = ", ".join(self.SUPPORTED_MODELS)
+            raise ValueError(
+                f"Model {model_id} is not supported. "
+                f"Please use one of the supported Anthropic Claude models: {models_list}"
+            )
+    
     def _format_input_for_model(self, text: str, model_id: str) -> Dict[str, Any]:
         """
         Format input for Anthropic Claude models with CountTokens API support.
@@ -99,25 +346,13 @@ class BedrockTokenCounter:
         Returns:
             Formatted input dictionary for CountTokens API
         """
-        # Only support Anthropic Claude models that support CountTokens API
-        if model_id in self.SUPPORTED_MODELS:
-            return {
-                "invokeModel": {
-                    "body": json.dumps({
-                        "anthropic_version": "bedrock-2023-05-31",
-                        "messages": [
-                            {"role": "user", "content": text}
-                        ],
-                        "max_tokens": 1
-                    })
-                }
+        self._check_model_supported(model_id)
+        # JSON encoding is only needed to escape the text; the envelope is fixed
+        return {
+            "invokeModel": {
+                "body": _CLAUDE_BODY_TEMPLATE % _json_bytes(text)
             }
-        else:
-            models_list = ", ".join(self.SUPPORTED_MODELS)
-            raise ValueError(
-                f"Model {model_id} is not supported. "
-                f"Please use one of the supported Anthropic Claude models: {models_list}"
-            )
+        }
     
     def count_tokens(self, text: str, model_id: str) -> int:
         """
@@ -134,6 +369,11 @@ class BedrockTokenCounter:
         Raises:
             ClientError: If Bedrock API returns an error
         """
+        if not text:
+            # Nothing to tokenize - answer locally instead of a round-trip
+            # (the API rejects empty message content anyway)
+            self._check_model_supported(model_id)
+            return 0
         raw_count = self._count_tokens_cached(text, model_id)
         overhead = self._get_message_overhead(model_id)
         return max(0, raw_count - overhead)
@@ -154,14 +394,38 @@ class BedrockTokenCounter:
             'hit_rate': cache_info.hits / (cache_info.hits + cache_info.misses) if (cache_info.hits + cache_info.misses) > 0 else 0.0
         }
     
+    def _prefetch_gallop(self, counts: _PrefixTokenCounts, start: int, step: int, limit: int) -> None:
+        """
+        Count the next gallop points from start concurrently.
+        
+        A serial gallop probes start + step, start + 3*step, start + 7*step, ...
+        one round trip at a time; this probes up to max_workers of them (strictly
+        between start and limit) in a single round. Does nothing without workers
+        or when the next point has already been counted.
+        """
+        if self._executor is None or counts.known(start + step):
+            return
+        low, high = min(start, limit), max(start, limit)
+        points = []
+        for j in range(1, self._max_workers + 1):
+            point = start + step * ((1 << j) - 1)
+            if not low < point < high:
+                break
+            points.append(point)
+        counts.prefetch(points, self._executor)
+    
     def truncate(self, text: str, max_tokens: int, model_id: str, return_metadata: bool = False):
         """
-        Truncate text to max tokens using adaptive learning algorithm.
+        Truncate text to max tokens using an estimate-seeded binary search.
         
         Algorithm:
-        1. Check if truncation needed (1 API call)
-        2. Use adaptive estimation that learns from each API call
-        3. Converge to exact result with minimal calls
+        1. Check if truncation needed (1 API call, none for texts of at
+           most max_tokens UTF-8 bytes unless metadata is requested)
+        2. Estimate the cut point from the text's chars-per-token ratio
+        3. Gallop away from the estimate until the cut point is bracketed
+           (several gallop points per round when max_workers > 1)
+        4. Narrow the bracket to the longest prefix that fits, with concurrent
+           probe rounds (or a binary search when max_workers is 1)
         
         Args:
             text: Input text to truncate
@@ -176,6 +440,23 @@ class BedrockTokenCounter:
         Raises:
             ClientError: If Bedrock API returns an error
         """
+        # Empty input or no token budget: the answer is known without an API call
+        if not text or max_tokens <= 0:
+            self._check_model_supported(model_id)
+            if return_metadata:
+                return "", {'api_calls': 0, 'final_token_count': 0}
+            return ""
+
+        # Every token covers at least one UTF-8 byte, so a text (or prefix) of
+        # at most max_tokens bytes is known to fit without asking the API
+        encoded = text.encode("utf-8", "surrogatepass")
+        if len(encoded) <= max_tokens and not return_metadata:
+            self._check_model_supported(model_id)
+            return text
+        # Characters whose bytes all fit ("ignore" drops a split trailing
+        # character, and only ever errs towards fewer characters)
+        fits_by_size = len(encoded[:max_tokens].decode("utf-8", "ignore"))
+
         # Step 1: Check if truncation is needed (1 API call)
         # Use raw API count internally for truncation algorithm
         full_count_raw = self._count_tokens_cached(text, model_id)
@@ -199,9 +480,11 @@ class BedrockTokenCounter:
         # - More punctuation = more tokens per char
         # - More spaces = more tokens per char  
         # - Longer words = fewer tokens per char
-        punctuation_ratio = sum(1 for c in text if c in '.,!?;:') / len(text)
-        space_ratio = text.count(' ') / len(text)
-        avg_word_length = len(text.replace(' ', '')) / max(text.count(' ') + 1, 1)
+        # (str.count scans in C; no per-character Python loop or copy of text)
+        spaces = text.count(' ')
+        punctuation_ratio = sum(map(text.count, '.,!?;:')) / len(text)
+        space_ratio = spaces / len(text)
+        avg_word_length = (len(text) - spaces) / (spaces + 1)
         
         # Adjust ratio based on text characteristics
         adjustment_factor = 1.0
@@ -215,118 +498,92 @@ class BedrockTokenCounter:
         # Apply smart adjustment
         smart_chars_per_token = chars_per_token * adjustment_factor
         target_chars = int(max_tokens * smart_chars_per_token)
-        target_chars = min(target_chars, len(text))
+        target_chars = min(max(target_chars, fits_by_size + 1), len(text) - 1)
         
-        best_text = ""
-        best_count = 0
+        # Token counts never decrease as the prefix grows, so the answer is the
+        # longest prefix that fits. Invariant: text[:lo] fits, text[:hi] does not.
+        # Prefixes are probed directly, bypassing the LRU: counts memoizes them
+        # by length, and caching every prefix would only evict useful entries
+        counts = _PrefixTokenCounts(
+            lambda prefix: max(0, self._count_tokens_impl(prefix, model_id) - overhead), text
+        )
+        counts.seed(len(text), full_count)
+        lo, hi = fits_by_size, len(text)
         
-        # Adaptive learning loop - each call improves our estimation
-        while api_calls < 20:  # Reasonable limit
-            # Test current estimation
-            test_text = text[:target_chars]
-            
-            try:
-                count = self.count_tokens(test_text, model_id)
-                api_calls += 1
-                
-                if count == max_tokens:
-                    # Perfect match!
-                    best_text = test_text
-                    best_count = count
+        # Step 3: Gallop away from the estimate until the cut point is bracketed.
+        # With workers, the next gallop points are probed concurrently
+        step = max(1, int(chars_per_token))
+        if counts[target_chars] <= max_tokens:
+            lo = target_chars
+            while lo + step < hi:
+                self._prefetch_gallop(counts, lo, step, hi)
+                if counts[lo + step] > max_tokens:
+                    hi = lo + step
                     break
-                elif count < max_tokens:
-                    # We can add more characters
-                    best_text = test_text
-                    best_count = count
-                    
-                    # Calculate how many more chars we can add
-                    remaining_tokens = max_tokens - count
-                    if remaining_tokens > 0:
-                        # Estimate additional chars needed
-                        additional_chars = int(remaining_tokens * chars_per_token)
-                        target_chars = min(target_chars + additional_chars, len(text))
-                        
-                        # If we're close, try adding one character at a time to find exact match
-                        if additional_chars <= 5:  # Increased threshold
-                            for i in range(len(best_text), min(len(best_text) + 15, len(text))):  # Increased search range
-                                test_text = text[:i + 1]
-                                try:
-                                    count = self.count_tokens(test_text, model_id)
-                                    api_calls += 1
-                                    
-                                    if count <= max_tokens:
-                                        best_text = test_text
-                                        best_count = count
-                                        # If we found exact match, we're done
-                                        if count == max_tokens:
-                                            break
-                                    else:
-                                        break
-                                except ClientError:
-                                    break
-                            break
-                else:
-                    # We have too many tokens, need to reduce
-                    # Calculate how many chars to remove
-                    excess_tokens = count - max_tokens
-                    chars_to_remove = int(excess_tokens * chars_per_token)
-                    target_chars = max(target_chars - chars_to_remove, 1)  # Don't go below 1
-                    
-                    # If we're close, try removing one character at a time
-                    if chars_to_remove <= 5:  # Increased threshold
-                        for i in range(len(best_text), 0, -1):
-                            test_text = text[:i]
-                            try:
-                                count = self.count_tokens(test_text, model_id)
-                                api_calls += 1
-                                
-                                if count <= max_tokens:
-                                    best_text = test_text
-                                    best_count = count
-                                    # If we found exact match, we're done
-                                    if count == max_tokens:
-                                        break
-                                    else:
-                                        break
-                            except ClientError:
-                                break
-                        break
-                        
-            except ClientError:
-                # If we get an error, try a smaller text
-                target_chars = max(target_chars - 10, 1)
-                continue
+                lo += step
+                step *= 2
+        else:
+            hi = target_chars
+            while hi - step > lo:
+                self._prefetch_gallop(counts, hi, -step, lo)
+                if counts[hi - step] <= max_tokens:
+                    lo = hi - step
+                    break
+                hi -= step
+                step *= 2
         
-        # Final verification and correction
-        if best_text:
-            final_token_count = self.count_tokens(best_text, model_id)
-            api_calls += 1
-            
-            # If we're not exactly at the target, do an exhaustive search
-            if final_token_count != max_tokens and api_calls < 20:
-                # Try every possible length to find exact match
-                for i in range(1, len(text) + 1):
-                    if api_calls >= 20:
-                        break
-                        
-                    test_text = text[:i]
-                    test_count = self.count_tokens(test_text, model_id)
-                    api_calls += 1
-                    
-                    if test_count == max_tokens:
-                        # Found exact match!
-                        best_text = test_text
-                        final_token_count = test_count
+        # Step 4: Narrow the bracket. With workers, each round probes evenly
+        # spaced prefixes concurrently, costing one round trip per round
+        if self._executor is not None:
+            while hi - lo > 1:
+                span = hi - lo
+                points = [lo + span * i // (self._max_workers + 1)
+                          for i in range(1, self._max_workers + 1)]
+                points = [p for p in points if lo < p < hi] or [lo + span // 2]
+                counts.prefetch(points, self._executor)
+                for p in sorted(set(points)):
+                    if counts[p] > max_tokens:
+                        hi = p
                         break
-                    elif test_count < max_tokens:
-                        # Keep track of the best under-target result
-                        best_text = test_text
-                        final_token_count = test_count
-                    # If test_count > max_tokens, we've gone too far, but keep searching
-                    # in case there's an exact match later (due to irregular tokenization)
-        else:
-            final_token_count = 0
+                    lo = p
         
+        # Binary search what is left; bisect returns the first prefix length
+        # that no longer fits (immediately, if the rounds above finished)
+        best_length = bisect_right(counts, max_tokens, lo + 1, hi) - 1
+        best_text = text[:best_length]
         if return_metadata:
-            return best_text, {'api_calls': api_calls, 'final_token_count': final_token_count}
-        return best_text
\ No newline at end of file
+            # Read first: a cut at fits_by_size was never probed, so its count
+            # may cost one more call, which api_calls must include
+            final_token_count = counts[best_length]
+            return best_text, {
+                'api_calls': 1 + counts.probes,
+                'final_token_count': final_token_count,
+            }
+        return best_text
+    
+    def truncate_many(self, texts: List[str], max_tokens: int, model_id: str,
+                      max_concurrency: int = 8) -> List[str]:
+        """
+        Truncate several texts to max tokens, overlapping their API calls.
+        
+        Each text is truncated as by truncate(); up to max_concurrency texts
+        are processed at once over the shared client's connection pool, so a
+        batch costs roughly as many round trips as its slowest text.
+        
+        Args:
+            texts: Input texts to truncate
+            max_tokens: Maximum number of tokens for each text
+            model_id: Full Bedrock model ID
+            max_concurrency: Maximum number of texts truncated concurrently
+        
+        Returns:
+            Truncated texts, in the same order as the input
+        
+        Raises:
+            ClientError: If Bedrock API returns an error
+        """
+        if not texts:
+            return []
+        # A separate pool: truncate() itself submits probes to self._executor
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(texts))) as pool:
+            return list(pool.map(lambda text: self.truncate(text, max_tokens, model_id), texts))
@@ -4,10 +4,44 @@ CLI interface for ttok4bedrock - ttok compatible.
 
 import click
 import sys
-from typing import Optional
+import threading
+from typing import List, Optional, Tuple
 from .bedrock_counter import BedrockTokenCounter
+from ._cache import CACHE_MODES, DiskCache
 from botocore.exceptions import ClientError, NoCredentialsError, NoRegionError
 
+# Generous upper bound on the characters one token can cover; truncating to
+# N tokens never keeps more than N * MAX_CHARS_PER_TOKEN characters
+MAX_CHARS_PER_TOKEN = 64
+_READ_CHUNK_SIZE = 65536
+
+
+def _warm_up(counter: BedrockTokenCounter, model_id: str) -> None:
+    """Build the Bedrock client and measure the model's message overhead."""
+    try:
+        counter._get_message_overhead(model_id)
+    except Exception:
+        pass  # the same error is raised and reported on the first real call
+
+
+def _read_input(input_file, limit: Optional[int]) -> Tuple[str, bool]:
+    """
+    Read the input, stopping once more than limit characters have been read.
+    
+    Returns the text read and whether reading stopped before the end.
+    """
+    if limit is None:
+        return input_file.read(), False
+    chunks: List[str] = []
+    size = 0
+    while size <= limit:
+        chunk = input_file.read(_READ_CHUNK_SIZE)
+        if not chunk:
+            return "".join(chunks), False
+        chunks.append(chunk)
+        size += len(chunk)
+    return "".join(chunks), True
+
 
 @click.command(context_settings={'help_option_names': ['-h', '--help']})
 @click.version_option()
@@ -19,7 +53,12 @@ from botocore.exceptions import ClientError, NoCredentialsError, NoRegionError
 @click.option("-m", "--model", "model_id", default="anthropic.claude-sonnet-4-6",
               help="Bedrock model ID")
 @click.option("--aws-region", help="AWS region for Bedrock")
-def cli(prompt, input_file, truncate, model_id, aws_region):
+@click.option("--cache-mode", type=click.Choice(CACHE_MODES), default="enabled",
+              show_default=True,
+              help="On-disk token count cache: replay never calls the API")
+@click.option("--no-cache", is_flag=True,
+              help="Disable the on-disk token count cache")
+def cli(prompt, input_file, truncate, model_id, aws_region, cache_mode, no_cache):
     """
     Count and truncate text based on tokens using Amazon Bedrock.
     
@@ -60,19 +99,43 @@ def cli(prompt, input_file, truncate, model_id, aws_region):
     To specify AWS region:
     
         ttok4bedrock --aws-region us-west-2 "text"
+    
+    Token counts are cached on disk, so repeated runs on the same text
+    skip the API. To bypass the cache:
+    
+        ttok4bedrock --no-cache "text"
     """
     
+    # Initialize counter
+    if no_cache:
+        cache_mode = "disabled"
+    disk_cache = DiskCache(mode=cache_mode) if cache_mode != "disabled" else None
+    counter = BedrockTokenCounter(region=aws_region, disk_cache=disk_cache)
+    
     # Get input text
     if not prompt and input_file is None:
         input_file = sys.stdin
     
-    text = " ".join(prompt) if prompt else ""
+    if input_file is not None:
+        # Set up the client and make the overhead probe while input is read,
+        # so only the count of the text itself is left waiting on the API.
+        # Not joined: a count that needs the overhead waits for the probe,
+        # and a result known without the API does not wait at all
+        threading.Thread(target=_warm_up, args=(counter, model_id), daemon=True).start()
+    
+    prompt_text = " ".join(prompt) if prompt else ""
+    text = prompt_text
+    cut_short = False
     
     if input_file is not None:
-        input_text = input_file.read()
-        if text:
-            text = input_text + " " + text
+        # When truncating, input past the longest possible result is never needed
+        limit = truncate * MAX_CHARS_PER_TOKEN if truncate and truncate > 0 else None
+        input_text, cut_short = _read_input(input_file, limit)
+        if prompt_text and not cut_short:
+            text = input_text + " " + prompt_text
         else:
+            # A cut-short input already holds more than the truncation keeps,
+            # so the prompt arguments after it could never be part of the result
             text = input_text
     
     if not text:
@@ -80,12 +143,16 @@ def cli(prompt, input_file, truncate, model_id, aws_region):
         sys.exit(1)
     
     try:
-        # Initialize counter
-        counter = BedrockTokenCounter(region=aws_region)
-        
         # Handle truncation
         if truncate:
             result_text = counter.truncate(text, truncate, model_id)
+            if cut_short and result_text == text:
+                # Everything read fits, so this input beats MAX_CHARS_PER_TOKEN
+                # (e.g. long runs of one character): read the rest and retry
+                text = input_text + input_file.read()
+                if prompt_text:
+                    text += " " + prompt_text
+                result_text = counter.truncate(text, truncate, model_id)
             # Output truncated text
             click.echo(result_text, nl=False)
         else:
@@ -120,6 +187,11 @@ def cli(prompt, input_file, truncate, model_id, aws_region):
     except Exception as e:
         click.echo(f"Error: {str(e)}", err=True)
         sys.exit(1)
+    
+    finally:
+        counter.close()
+        if disk_cache is not None:
+            disk_cache.close()
 
 
 if __name__ == "__main__":